@@ -1,4 +1,5 @@
 from utils import get_logger
+import scraper
 from crawler.frontier import Frontier
 from crawler.worker import Worker
 
@@ -20,6 +21,10 @@ class Crawler(object):
     def start(self):
         self.start_async()
         self.join()
+        # Page stats are recorded on a background daemon thread; let it catch
+        # up and write the final numbers before the process exits.
+        scraper.flush_stats()
+        scraper.save_stats()
 
     def join(self):
         for worker in self.workers:
@@ -1,3 +1,5 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread
 
 from inspect import getsource
@@ -6,6 +8,10 @@ from utils import get_logger
 import scraper
 import time
 
+# Shared by all workers so a page can be parsed while its worker sits out
+# the politeness delay instead of before it.
+_SCRAPE_POOL = ThreadPoolExecutor(max_workers=os.cpu_count())
+
 
 class Worker(Thread):
     def __init__(self, worker_id, config, frontier):
@@ -27,8 +33,9 @@ class Worker(Thread):
             self.logger.info(
                 f"Downloaded {tbd_url}, status <{resp.status}>, "
                 f"using cache {self.config.cache_server}.")
-            scraped_urls = scraper.scraper(tbd_url, resp)
+            scraped = _SCRAPE_POOL.submit(scraper.scraper, tbd_url, resp)
+            time.sleep(self.config.time_delay)
+            scraped_urls = scraped.result()
             for scraped_url in scraped_urls:
                 self.frontier.add_url(scraped_url)
             self.frontier.mark_url_complete(tbd_url)
-            time.sleep(self.config.time_delay)
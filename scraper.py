@@ -1,9 +1,30 @@
 import re
 import os
+import stat
+import sys
+import tempfile
 import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from urllib.parse import urlparse, urljoin, urldefrag
-from bs4 import BeautifulSoup
-from collections import defaultdict
+from bs4 import BeautifulSoup, SoupStrainer
+from collections import Counter, OrderedDict, defaultdict
+
+try:
+    # Lexbor is a C HTML5 parser; much faster than building a BeautifulSoup tree.
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    # Hyperscan matches all the trap patterns in a single DFA pass.
+    import hyperscan
+except ImportError:
+    hyperscan = None
 
 # ============================================================
 # DATA COLLECTION (for the report)
@@ -12,12 +33,28 @@ from collections import defaultdict
 # After crawling, you can inspect them to answer report questions.
 
 unique_pages = set()            # All unique URLs visited (defragmented)
-word_counts = defaultdict(int)  # word -> total count across all pages
+word_counts = Counter()         # word -> total count across all pages
 longest_page = ("", 0)          # (url, word_count) of longest page
-subdomain_pages = defaultdict(set)  # subdomain -> set of URLs found there
+subdomain_counts = defaultdict(int)  # subdomain -> number of unique pages
+subdomain_pages = defaultdict(set)  # subdomain -> sample of URLs found there
+MAX_SUBDOMAIN_SAMPLES = 32  # The report only shows 5; no need to keep them all
 
 # File to periodically save progress
 STATS_FILE = "crawl_stats.json"
+SAVE_INTERVAL = 30  # Minimum seconds between periodic saves
+_last_save = 0.0    # time.monotonic() of the last save
+_save_in_progress = False  # True while a background save is writing
+_save_pool = ThreadPoolExecutor(max_workers=1)
+# Read once at import (os.umask can only be queried by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Pages bigger than this are skipped entirely (>10MB likely not useful text)
+MAX_PAGE_SIZE = 10 * 1024 * 1024
+
+# Pages with fewer words than this are low-information: their links are
+# still followed, but they don't count towards the stats
+MIN_PAGE_WORDS = 25
 
 # ============================================================
 # STOP WORDS (common English words to ignore in word counting)
@@ -45,13 +82,37 @@ STOP_WORDS = {
     "with", "won't", "would", "wouldn't", "you", "you'd", "you'll", "you're",
     "you've", "your", "yours", "yourself", "yourselves"
 }
+# Interned so lookups against them can short-circuit on identity
+STOP_WORDS = frozenset(sys.intern(w) for w in STOP_WORDS)
 
 # ============================================================
 # TRAP DETECTION
 # ============================================================
+class BoundedCounter(OrderedDict):
+    """
+    A defaultdict(int)-style counter that only remembers the `maxsize` most
+    recently updated keys, so it can't grow without bound over a long crawl.
+    """
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+    
+    def __missing__(self, key):
+        return 0
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
 # Track how many URLs we've seen per path pattern to detect traps
-# (e.g., calendar pages that go on forever, or paginated results)
-path_pattern_counts = defaultdict(int)
+# (e.g., calendar pages that go on forever, or paginated results).
+# Keyed by hash(pattern) rather than the pattern string itself: a fixed-size
+# int instead of a 50-200 char string per entry, and a rare collision only
+# merges two patterns' counts.
+path_pattern_counts = BoundedCounter(maxsize=100_000)
 MAX_PATTERN_COUNT = 100  # If we see 100+ URLs with the same pattern, it's likely a trap
 
 # Known trap patterns
@@ -93,34 +154,374 @@ TRAP_PATTERNS = [
     r'javascript:',
 ]
 
+# Domains we're allowed to crawl (the domain itself or any subdomain):
+#   *.ics.uci.edu/*
+#   *.cs.uci.edu/*
+#   *.informatics.uci.edu/*
+#   *.stat.uci.edu/*
+_ALLOWED_EXACT = frozenset({
+    'ics.uci.edu', 'cs.uci.edu', 'informatics.uci.edu', 'stat.uci.edu',
+})
+_ALLOWED_SUFFIXES = tuple('.' + domain for domain in sorted(_ALLOWED_EXACT))
+
+# File extensions that are never worth crawling. Checked as a set lookup on
+# whatever follows the last '.' in the path.
+_BAD_EXTS = frozenset({
+    "css", "js", "bmp", "gif", "jpg", "jpeg", "ico",
+    "png", "tif", "tiff", "mid", "mp2", "mp3", "mp4",
+    "wav", "avi", "mov", "mpeg", "ram", "m4v", "mkv", "ogg", "ogv", "pdf",
+    "ps", "eps", "tex", "ppt", "pptx", "doc", "docx", "xls", "xlsx", "names",
+    "data", "dat", "exe", "bz2", "tar", "msi", "bin", "7z", "psd", "dmg", "iso",
+    "epub", "dll", "cnf", "tgz", "sha1",
+    "thmx", "mso", "arff", "rtf", "jar", "csv",
+    "rm", "smil", "wmv", "swf", "wma", "zip", "rar", "gz",
+    "img", "sql", "db", "bak", "cfg", "conf", "ini", "log",
+    "xml", "json", "rss", "atom", "svg", "woff", "woff2", "ttf", "eot",
+    "apk", "war", "mpg", "php", "asp", "jsp", "cgi", "py", "pl", "sh", "bat",
+    "r", "m", "cc", "c", "h", "cpp", "java", "class", "o",
+})
+
+# Compiled once at import so is_valid doesn't re-resolve the patterns per URL.
+# The trap patterns are fused into one alternation: a single scan instead of
+# one re.search call per pattern.
+_TRAP_RE = re.compile("|".join(TRAP_PATTERNS))
+_DIGIT_RE = re.compile(r'\d+')
+_WORD_RE = re.compile(r'[a-zA-Z]+')
+
+
+def _compile_trap_db():
+    if hyperscan is None:
+        return None
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[pattern.encode() for pattern in TRAP_PATTERNS],
+            ids=list(range(len(TRAP_PATTERNS))),
+            flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(TRAP_PATTERNS))
+        return db
+    except hyperscan.error as e:
+        print(f"Could not compile trap patterns with hyperscan: {e}")
+        return None
+
+
+_TRAP_DB = _compile_trap_db()
+# Hyperscan scratch space can't be shared between threads, so each worker
+# thread gets its own
+_trap_scratch = threading.local()
+
+
+def _stop_scan(*args):
+    # Returning True from a match handler ends the scan at the first hit
+    return True
+
+
+def matches_trap(url):
+    """True if the (lowercased) URL matches any of TRAP_PATTERNS."""
+    if _TRAP_DB is None:
+        return _TRAP_RE.search(url) is not None
+    
+    scratch = getattr(_trap_scratch, 'scratch', None)
+    if scratch is None:
+        scratch = _trap_scratch.scratch = hyperscan.Scratch(_TRAP_DB)
+    try:
+        _TRAP_DB.scan(url.encode(), match_event_handler=_stop_scan,
+                      scratch=scratch)
+    except hyperscan.ScanTerminated:
+        return True
+    return False
+
+
+@lru_cache(maxsize=8192)
+def _cached_urlparse(url):
+    """urlparse, memoized: is_valid and get_path_pattern parse the same URL."""
+    return urlparse(url)
+
+
 def get_path_pattern(url):
     """Convert a URL path into a pattern by replacing numbers with {N}.
     This helps detect trap patterns like /page/1, /page/2, /page/3..."""
-    parsed = urlparse(url)
+    parsed = _cached_urlparse(url)
     # Replace sequences of digits with {N}
-    pattern = re.sub(r'\d+', '{N}', parsed.path)
+    pattern = _DIGIT_RE.sub('{N}', parsed.path)
     return f"{parsed.netloc}{pattern}"
 
 
-def save_stats():
-    """Save current stats to a JSON file for the report."""
-    try:
-        stats = {
-            "unique_pages_count": len(unique_pages),
-            "longest_page": {
-                "url": longest_page[0],
-                "word_count": longest_page[1]
-            },
-            "top_50_words": sorted(word_counts.items(), key=lambda x: -x[1])[:50],
-            "subdomains": {
-                domain: {"count": len(urls), "sample_urls": list(urls)[:5]}
-                for domain, urls in sorted(subdomain_pages.items())
+def _snapshot_stats():
+    """Build the report stats as a plain dict, safe to serialize elsewhere."""
+    return {
+        "unique_pages_count": len(unique_pages),
+        "longest_page": {
+            "url": longest_page[0],
+            "word_count": longest_page[1]
+        },
+        "top_50_words": word_counts.most_common(50),
+        "subdomains": {
+            domain: {
+                "count": count,
+                "sample_urls": list(subdomain_pages[domain])[:5]
             }
+            for domain, count in sorted(subdomain_counts.items())
         }
-        with open(STATS_FILE, 'w') as f:
-            json.dump(stats, f, indent=2)
+    }
+
+
+def _write_stats(stats, indent):
+    # Write to a fresh temp file and swap it in, so a crash mid-write never
+    # leaves a truncated STATS_FILE behind
+    stats_dir = os.path.dirname(os.path.abspath(STATS_FILE))
+    fd, tmp_file = tempfile.mkstemp(dir=stats_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            # mkstemp creates the file 0600; give it the permissions a plain
+            # open(STATS_FILE, 'w') would have left it with
+            try:
+                mode = stat.S_IMODE(os.stat(STATS_FILE).st_mode)
+            except FileNotFoundError:
+                mode = 0o666 & ~_UMASK
+            os.chmod(tmp_file, mode)
+            json.dump(stats, f, indent=indent)
+        os.replace(tmp_file, STATS_FILE)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+
+
+def save_stats(indent=2):
+    """
+    Save current stats to a JSON file for the report.
+    
+    The write goes through the save thread, behind any background save
+    already in flight, and this waits for it to finish.
+    """
+    global _last_save
+    _last_save = time.monotonic()
+    try:
+        _save_pool.submit(_write_stats, _snapshot_stats(), indent).result()
+    except Exception as e:
+        print(f"Error saving stats: {e}")
+
+
+def save_stats_in_background():
+    """
+    Snapshot the stats and write them (compactly) on the save thread.
+    
+    Does nothing if the previous background save hasn't finished yet.
+    """
+    global _last_save, _save_in_progress
+    if _save_in_progress:
+        return
+    _save_in_progress = True
+    _last_save = time.monotonic()
+    _save_pool.submit(_background_save, _snapshot_stats())
+
+
+def _background_save(stats):
+    global _save_in_progress
+    try:
+        _write_stats(stats, indent=None)
     except Exception as e:
         print(f"Error saving stats: {e}")
+    finally:
+        _save_in_progress = False
+
+
+# ============================================================
+# STATS COLLECTION
+# ============================================================
+# Pages are recorded by a single background thread that owns the stat
+# structures above, so the tokenizing and bookkeeping stay off the
+# scraping path. extract_next_links only enqueues (url, visible_text).
+# Bounded since each entry can hold up to MAX_PAGE_SIZE of text; if the
+# stats thread falls behind, scrapers wait on put() instead of piling up
+# pages in memory.
+_stats_queue = queue.Queue(maxsize=32)
+
+
+def record_page(url, text):
+    """
+    Update the report stats with one page's visible text.
+    
+    Callers are expected to have already dropped low-information pages
+    (see has_enough_words).
+    """
+    global longest_page
+    
+    # Tokenize: split into words, keep only alphabetic tokens (one regex
+    # pass over the text, lowercased once up front)
+    words = _WORD_RE.findall(text.lower())
+    word_total = len(words)
+    
+    defragged_url = _record_url(url)
+    
+    # Track longest page
+    if word_total > longest_page[1]:
+        longest_page = (defragged_url, word_total)
+    
+    # Count words (excluding stop words)
+    word_counts.update(
+        w for w in words if len(w) > 1 and w not in STOP_WORDS)
+    
+    _maybe_save_stats()
+
+
+def _maybe_save_stats():
+    # Periodically save stats (every 100 pages, unless we just did)
+    if (len(unique_pages) % 100 == 0
+            and time.monotonic() - _last_save > SAVE_INTERVAL):
+        save_stats_in_background()
+        print(f"[STATS] Unique pages so far: {len(unique_pages)}")
+
+
+def _record_url(url):
+    """Count url as a unique page and towards its subdomain; returns it
+    defragmented."""
+    # Defragment URL for uniqueness
+    defragged_url = urldefrag(url)[0]
+    if defragged_url in unique_pages:
+        return defragged_url
+    unique_pages.add(defragged_url)
+    
+    # Track subdomains within *.ics.uci.edu
+    parsed_url = _cached_urlparse(defragged_url)
+    netloc = sys.intern(parsed_url.netloc.lower())
+    # Record subdomain for any uci.edu domain
+    subdomain_counts[netloc] += 1
+    samples = subdomain_pages[netloc]
+    if len(samples) < MAX_SUBDOMAIN_SAMPLES:
+        samples.add(defragged_url)
+    return defragged_url
+
+
+def has_enough_words(text):
+    """True if text has at least MIN_PAGE_WORDS words; stops scanning there."""
+    found = sum(1 for _ in islice(_WORD_RE.finditer(text), MIN_PAGE_WORDS))
+    return found >= MIN_PAGE_WORDS
+
+
+def flush_stats():
+    """Block until every page handed off so far has been recorded."""
+    _stats_queue.join()
+
+
+def _stats_loop():
+    while True:
+        url, text = _stats_queue.get()
+        try:
+            record_page(url, text)
+        except Exception as e:
+            print(f"Error recording stats for {url}: {e}")
+        finally:
+            _stats_queue.task_done()
+
+
+threading.Thread(target=_stats_loop, name="Stats", daemon=True).start()
+
+
+# ============================================================
+# HTML PARSING
+# ============================================================
+# Used to sniff the body so JSON/PDF/binary served as text/html never gets
+# parsed. Only bodies that are clearly not HTML are rejected.
+_NON_HTML_PREFIXES = (
+    b'{', b'[', b'%PDF', b'\x89PNG', b'GIF8', b'\xff\xd8\xff', b'PK\x03\x04',
+)
+_UTF8_BOM = b'\xef\xbb\xbf'
+_UTF16_BOMS = (b'\xff\xfe', b'\xfe\xff')
+_NON_SPACE_RE = re.compile(rb'\S')
+
+
+def looks_like_html(content):
+    """
+    Cheap check that the body could be HTML: it doesn't start like JSON,
+    PDF or a common binary format, and has no NUL bytes near the start.
+    """
+    # UTF-16 text is full of NULs; let the parser deal with it
+    if content.startswith(_UTF16_BOMS):
+        return True
+    
+    # Skip a UTF-8 BOM and leading whitespace without copying the body
+    start = len(_UTF8_BOM) if content.startswith(_UTF8_BOM) else 0
+    match = _NON_SPACE_RE.search(content, start)
+    if match is None:
+        return False
+    
+    head = content[match.start():match.start() + 1024]
+    return not head.startswith(_NON_HTML_PREFIXES) and b'\x00' not in head
+
+
+# Lets BeautifulSoup skip building nodes for everything but links
+_A_STRAINER = SoupStrainer('a', href=True)
+
+
+def parse_html(content, with_text=True):
+    """
+    Parse raw HTML into (visible_text, hrefs).
+    
+    Uses selectolax's Lexbor parser when it is installed and the page is
+    plain UTF-8, and falls back to BeautifulSoup otherwise (or if Lexbor
+    chokes on the page).
+    If with_text is False, only links are extracted (through a SoupStrainer
+    on the BeautifulSoup path) and visible_text is None; for callers that
+    don't collect stats from the page.
+    """
+    if LexborHTMLParser is not None:
+        html = _decode_utf8(content)
+        if html is not None:
+            try:
+                return _parse_with_lexbor(html, with_text)
+            except Exception:
+                pass
+    return _parse_with_bs4(content, with_text)
+
+
+def _decode_utf8(content):
+    """
+    Decode content for Lexbor, or return None if it isn't plain UTF-8.
+    
+    Lexbor assumes UTF-8 and ignores <meta charset>, so UTF-16 (BOM) and
+    legacy-encoded pages are left to BeautifulSoup's encoding detection.
+    """
+    if content.startswith(_UTF16_BOMS):
+        return None
+    try:
+        return content.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return None
+
+
+def _parse_with_lexbor(html, with_text):
+    tree = LexborHTMLParser(html)
+    hrefs = [a.attributes.get('href') or '' for a in tree.css('a[href]')]
+    if not with_text:
+        return None, hrefs
+    
+    # Only remove script/style — keep nav/header/footer since UCI pages
+    # often have meaningful content there
+    for tag in tree.css('script, style, noscript'):
+        tag.decompose()
+    
+    root = tree.root
+    text = root.text(separator=' ', strip=True) if root is not None else ''
+    return text, hrefs
+
+
+def _parse_with_bs4(content, with_text):
+    parse_only = None if with_text else _A_STRAINER
+    try:
+        soup = BeautifulSoup(content, 'lxml', parse_only=parse_only)
+    except Exception:
+        soup = BeautifulSoup(content, 'html.parser', parse_only=parse_only)
+    
+    hrefs = [anchor['href'] for anchor in soup.find_all('a', href=True)]
+    if not with_text:
+        return None, hrefs
+    
+    # Get visible text (not scripts, styles, etc.)
+    for tag in soup(['script', 'style', 'noscript']):
+        tag.decompose()
+    
+    text = soup.get_text(separator=' ', strip=True)
+    return text, hrefs
 
 
 # ============================================================
@@ -144,10 +545,8 @@ def scraper(url, resp):
 
 def extract_next_links(url, resp):
     """
-    Parse the response, collect stats, and extract links.
+    Parse the response, queue it for stats, and extract links.
     """
-    global longest_page
-    
     # ----------------------------------------------------------
     # 1. Check if response is usable
     # ----------------------------------------------------------
@@ -160,97 +559,68 @@ def extract_next_links(url, resp):
         return []
     
     # Check content type - only process HTML
-    content_type = resp.raw_response.headers.get('Content-Type', '')
-    if content_type and 'text/html' not in content_type:
+    content_type = resp.raw_response.headers.get('Content-Type', '').lower()
+    if content_type and 'html' not in content_type[:64]:
+        return []
+    
+    # Avoid very large pages
+    if len(resp.raw_response.content) > MAX_PAGE_SIZE:
         return []
     
-    # Avoid very large pages (>10MB likely not useful text)
-    if len(resp.raw_response.content) > 10 * 1024 * 1024:
+    # Don't trust the header alone: skip bodies that don't look like HTML
+    if not looks_like_html(resp.raw_response.content):
         return []
     
     # ----------------------------------------------------------
-    # 2. Parse the HTML
+    # 2. Parse the HTML: visible text + raw hrefs
     # ----------------------------------------------------------
     try:
-        soup = BeautifulSoup(resp.raw_response.content, 'lxml')
+        text, hrefs = parse_html(resp.raw_response.content)
     except Exception:
-        try:
-            soup = BeautifulSoup(resp.raw_response.content, 'html.parser')
-        except Exception:
-            return []
+        return []
     
     # ----------------------------------------------------------
-    # 3. Extract text and check for low-information pages
+    # 3. Hand the text off for stats collection
     # ----------------------------------------------------------
-    # Get visible text (not scripts, styles, etc.)
-    # Only remove script/style — keep nav/header/footer since UCI pages
-    # often have meaningful content there
-    text_soup = BeautifulSoup(resp.raw_response.content, 'lxml')
-    for tag in text_soup(['script', 'style', 'noscript']):
-        tag.decompose()
-    
-    text = text_soup.get_text(separator=' ', strip=True)
-    
-    # Tokenize: split into words, keep only alphabetic tokens
-    words = [w.lower() for w in re.findall(r'[a-zA-Z]+', text)]
-    
-    # Low information check: skip pages with very few words
-    if len(words) < 25:
-        # Still extract links from navigation-heavy pages, but don't count stats
-        pass
-    else:
-        # ----------------------------------------------------------
-        # 4. Collect statistics for the report
-        # ----------------------------------------------------------
-        # Defragment URL for uniqueness
-        defragged_url = urldefrag(url)[0]
-        unique_pages.add(defragged_url)
-        
-        # Track longest page
-        if len(words) > longest_page[1]:
-            longest_page = (defragged_url, len(words))
-        
-        # Count words (excluding stop words)
-        for word in words:
-            if word not in STOP_WORDS and len(word) > 1:
-                word_counts[word] += 1
-        
-        # Track subdomains within *.ics.uci.edu
-        parsed_url = urlparse(defragged_url)
-        netloc = parsed_url.netloc.lower()
-        # Record subdomain for any uci.edu domain
-        subdomain_pages[netloc].add(defragged_url)
-        
-        # Periodically save stats (every 100 pages)
-        if len(unique_pages) % 100 == 0:
-            save_stats()
-            print(f"[STATS] Unique pages so far: {len(unique_pages)}")
+    # Low-information pages are caught here without tokenizing the whole
+    # text; we still extract links from them, but don't count stats
+    if has_enough_words(text):
+        _stats_queue.put((url, text))
     
     # ----------------------------------------------------------
-    # 5. Extract links
+    # 4. Extract links
     # ----------------------------------------------------------
-    links = []
+    # Nav bars and footers repeat the same links many times over; dedupe both
+    # the raw hrefs and the normalized URLs so each is only processed and
+    # validated once. dicts rather than sets keep document order, so the
+    # crawl order stays reproducible between runs
+    links = {}
     
-    for anchor in soup.find_all('a', href=True):
-        href = anchor['href'].strip()
+    for href in dict.fromkeys(hrefs):
+        href = href.strip()
         
         # Skip empty, javascript, mailto links
         if not href or href.startswith(('javascript:', 'mailto:', 'tel:', '#')):
             continue
         
-        # Convert relative URLs to absolute
-        absolute_url = urljoin(url, href)
+        # Convert relative URLs to absolute (urljoin is only needed when
+        # the href isn't absolute already)
+        if href.startswith(('http://', 'https://')):
+            absolute_url = href
+        else:
+            absolute_url = urljoin(url, href)
         
         # Remove fragment
-        defragged = urldefrag(absolute_url)[0]
+        frag = absolute_url.find('#')
+        defragged = absolute_url if frag == -1 else absolute_url[:frag]
         
         # Normalize: remove trailing slash for consistency
         if defragged.endswith('/'):
             defragged = defragged.rstrip('/')
         
-        links.append(defragged)
+        links[defragged] = None
     
-    return links
+    return list(links)
 
 
 # ============================================================
@@ -263,70 +633,43 @@ def is_valid(url):
     Returns True if the URL should be crawled, False otherwise.
     """
     try:
-        parsed = urlparse(url)
+        # Checks run cheapest-first, so most rejects never reach a regex
         
         # ----------------------------------------------------------
-        # Scheme check
+        # URL length check
         # ----------------------------------------------------------
-        if parsed.scheme not in {"http", "https"}:
+        if len(url) > 300:
             return False
         
-        netloc = parsed.netloc.lower()
-        path = parsed.path.lower()
+        parsed = _cached_urlparse(url)
         
         # ----------------------------------------------------------
-        # Domain check: must be within allowed domains
+        # Scheme check
         # ----------------------------------------------------------
-        # List of websites to crawl:
-        #   *.ics.uci.edu/*
-        #   *.cs.uci.edu/*
-        #   *.informatics.uci.edu/*
-        #   *.stat.uci.edu/*
-        
-        allowed = False
-        if (netloc == 'ics.uci.edu' or netloc.endswith('.ics.uci.edu')):
-            allowed = True
-        elif (netloc == 'cs.uci.edu' or netloc.endswith('.cs.uci.edu')):
-            allowed = True
-        elif (netloc == 'informatics.uci.edu' or netloc.endswith('.informatics.uci.edu')):
-            allowed = True
-        elif (netloc == 'stat.uci.edu' or netloc.endswith('.stat.uci.edu')):
-            allowed = True
-        
-        if not allowed:
+        if parsed.scheme not in {"http", "https"}:
             return False
         
         # ----------------------------------------------------------
-        # File extension check: avoid non-HTML files
+        # Path depth check: very deep paths are often traps
         # ----------------------------------------------------------
-        if re.match(
-            r".*\.(css|js|bmp|gif|jpe?g|ico"
-            + r"|png|tiff?|mid|mp2|mp3|mp4"
-            + r"|wav|avi|mov|mpeg|ram|m4v|mkv|ogg|ogv|pdf"
-            + r"|ps|eps|tex|ppt|pptx|doc|docx|xls|xlsx|names"
-            + r"|data|dat|exe|bz2|tar|msi|bin|7z|psd|dmg|iso"
-            + r"|epub|dll|cnf|tgz|sha1"
-            + r"|thmx|mso|arff|rtf|jar|csv"
-            + r"|rm|smil|wmv|swf|wma|zip|rar|gz"
-            + r"|img|sql|db|bak|cfg|conf|ini|log"
-            + r"|xml|json|rss|atom|svg|woff|woff2|ttf|eot"
-            + r"|apk|war|mpg|php|asp|jsp|cgi|py|pl|sh|bat"
-            + r"|r|m|cc|c|h|cpp|java|class|o)$", path):
+        path_parts = [p for p in parsed.path.split('/') if p]
+        if len(path_parts) > 15:
             return False
         
+        netloc = parsed.netloc.lower()
+        path = parsed.path.lower()
+        
         # ----------------------------------------------------------
-        # Trap detection: known bad patterns
+        # Domain check: must be within allowed domains
         # ----------------------------------------------------------
-        full_url = url.lower()
-        for pattern in TRAP_PATTERNS:
-            if re.search(pattern, full_url):
-                return False
+        if not (netloc.endswith(_ALLOWED_SUFFIXES) or netloc in _ALLOWED_EXACT):
+            return False
         
         # ----------------------------------------------------------
-        # Path depth check: very deep paths are often traps
+        # File extension check: avoid non-HTML files
         # ----------------------------------------------------------
-        path_parts = [p for p in parsed.path.split('/') if p]
-        if len(path_parts) > 15:
+        dot = path.rfind('.')
+        if dot != -1 and path[dot + 1:] in _BAD_EXTS:
             return False
         
         # ----------------------------------------------------------
@@ -337,29 +680,28 @@ def is_valid(url):
             if len(params) > 5:
                 return False
         
+        # ----------------------------------------------------------
+        # Trap detection: known bad patterns
+        # ----------------------------------------------------------
+        full_url = url.lower()
+        if matches_trap(full_url):
+            return False
+        
         # ----------------------------------------------------------
         # Repeating path segments (trap indicator)
         # e.g., /a/b/a/b/a/b/
         # ----------------------------------------------------------
         if len(path_parts) >= 4:
-            for i in range(len(path_parts) - 1):
-                segment = path_parts[i]
-                count = path_parts.count(segment)
-                if count >= 3:
-                    return False
+            if Counter(path_parts).most_common(1)[0][1] >= 3:
+                return False
         
         # ----------------------------------------------------------
         # Path pattern frequency check (detect infinite traps)
+        # Last, since it's the only check that updates state
         # ----------------------------------------------------------
-        pattern = get_path_pattern(url)
-        path_pattern_counts[pattern] += 1
-        if path_pattern_counts[pattern] > MAX_PATTERN_COUNT:
-            return False
-        
-        # ----------------------------------------------------------
-        # URL length check
-        # ----------------------------------------------------------
-        if len(url) > 300:
+        pattern_key = hash(get_path_pattern(url))
+        path_pattern_counts[pattern_key] += 1
+        if path_pattern_counts[pattern_key] > MAX_PATTERN_COUNT:
             return False
         
         return True
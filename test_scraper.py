@@ -43,7 +43,7 @@ class MockResponse:
 # IMPORT YOUR SCRAPER
 # ============================================================
 import scraper as scraper_module
-from scraper import scraper, is_valid, unique_pages, word_counts, subdomain_pages, save_stats
+from scraper import scraper, is_valid, unique_pages, word_counts, subdomain_counts, save_stats, flush_stats
 
 
 def test_single_url(url):
@@ -179,7 +179,8 @@ def mini_crawl(seed_urls, max_pages=30):
         except Exception as e:
             print(f"  ERROR: {e}")
     
-    # Print summary
+    # Print summary (once the stats thread has caught up)
+    flush_stats()
     print(f"\n{'='*70}")
     print("CRAWL SUMMARY")
     print(f"{'='*70}")
@@ -190,11 +191,11 @@ def mini_crawl(seed_urls, max_pages=30):
     print(f"  Longest page: {scraper_module.longest_page[0]} ({scraper_module.longest_page[1]} words)")
     
     print(f"\n  Subdomains found:")
-    for domain in sorted(subdomain_pages.keys()):
-        print(f"    {domain}: {len(subdomain_pages[domain])} pages")
+    for domain in sorted(subdomain_counts.keys()):
+        print(f"    {domain}: {subdomain_counts[domain]} pages")
     
     print(f"\n  Top 20 words:")
-    top_words = sorted(word_counts.items(), key=lambda x: -x[1])[:20]
+    top_words = word_counts.most_common(20)
     for word, count in top_words:
         print(f"    {word}: {count}")
     